@@ -11,6 +11,7 @@ from fastapi.responses import RedirectResponse
 import os
 from pathlib import Path
 from .backend import routers, database
+from .backend.middleware import AuthMiddleware
 
 # Initialize web host
 app = FastAPI(
@@ -21,6 +22,9 @@ app = FastAPI(
 # Initialize database with sample data if empty
 database.init_database()
 
+# Resolve the authenticated teacher once per request
+app.add_middleware(AuthMiddleware)
+
 # Mount the static files directory for serving the frontend
 current_dir = Path(__file__).parent
 app.mount("/static", StaticFiles(directory=os.path.join(current_dir, "static")), name="static")
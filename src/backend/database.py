@@ -2,13 +2,162 @@
 In-memory database configuration and setup for Mergington High School API
 """
 
-from argon2 import PasswordHasher, exceptions as argon2_exceptions
-from typing import Dict, Any, List, Optional
+import base64
+import hashlib
+import hmac
+import itertools
+import re
+import secrets
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from operator import attrgetter
+from argon2 import PasswordHasher, Parameters, extract_parameters
+from argon2.low_level import hash_secret_raw
+from typing import Dict, List, Optional, Set, Tuple
+
+
+# Two-digit 24-hour time, 00:00 through 23:59
+_TIME_PATTERN = re.compile(r"([01][0-9]|2[0-3]):([0-5][0-9])")
+
+
+def time_to_minutes(value: str) -> int:
+    """Convert a 24-hour 'HH:MM' time to minutes since midnight.
+
+    Raises ValueError if the value is not in that format.
+    """
+    match = _TIME_PATTERN.fullmatch(value)
+    if not match:
+        raise ValueError(f"Invalid time: {value!r}")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+@dataclass(slots=True)
+class ScheduleDetails:
+    """Structured schedule of an activity.
+
+    start_min/end_min hold the times as minutes since midnight for cheap
+    filtering; they are left out of API responses.
+    """
+    days: List[str]
+    start_time: str
+    end_time: str
+    start_min: int = field(init=False)
+    end_min: int = field(init=False)
+
+    def __post_init__(self):
+        self.start_min = time_to_minutes(self.start_time)
+        self.end_min = time_to_minutes(self.end_time)
+
+
+@dataclass(slots=True)
+class Activity:
+    """An extracurricular activity.
+
+    Participants are kept as an insertion-ordered dict (email -> None) so
+    membership checks, signups and removals are O(1) while the signup
+    order is preserved.
+    """
+    name: str
+    description: str
+    schedule: str
+    schedule_details: ScheduleDetails
+    max_participants: int
+    participants: Dict[str, None]
+
+
+@dataclass(slots=True)
+class Teacher:
+    """A teacher account"""
+    username: str
+    display_name: str
+    password: str
+    role: str
+
+
+@dataclass(slots=True)
+class Announcement:
+    """An announcement shown on the site between its start and end dates"""
+    id: str
+    message: str
+    start_date: Optional[str]
+    end_date: Optional[str]
+    created_by: str
+    created_at: str = ""
+
+
+class ActivityIndex:
+    """Schedule lookups for activities, built once from the collection.
+
+    - by_day: day name -> names of activities held on that day
+    - by_start: (start minute, name) pairs sorted by start time
+    - by_end: (end minute, name) pairs sorted by end time
+    - sorted_days: every day that has at least one activity, sorted
+    - position: activity name -> its position in the collection, used to
+      return filtered results in the same order as the collection
+    """
+
+    def __init__(self):
+        self.position: Dict[str, int] = {}
+        self.by_day: Dict[str, Set[str]] = {}
+        self.by_start: List[Tuple[int, str]] = []
+        self.by_end: List[Tuple[int, str]] = []
+        self.sorted_days: Tuple[str, ...] = ()
+
+    def rebuild(self, activities: Dict[str, Activity]):
+        """Recompute all lookups from the given activities"""
+        position: Dict[str, int] = {}
+        by_day: Dict[str, Set[str]] = {}
+        by_start = []
+        by_end = []
+
+        for index, (name, activity) in enumerate(activities.items()):
+            position[name] = index
+            schedule = activity.schedule_details
+            for day in schedule.days:
+                by_day.setdefault(day, set()).add(name)
+            by_start.append((schedule.start_min, name))
+            by_end.append((schedule.end_min, name))
+
+        by_start.sort()
+        by_end.sort()
+
+        self.position = position
+        self.by_day = by_day
+        self.by_start = by_start
+        self.by_end = by_end
+        self.sorted_days = tuple(sorted(by_day))
+
 
 # In-memory storage
-activities_collection: Dict[str, Dict[str, Any]] = {}
-teachers_collection: Dict[str, Dict[str, Any]] = {}
-announcements_collection: Dict[str, Dict[str, Any]] = {}
+activities_collection: Dict[str, Activity] = {}
+teachers_collection: Dict[str, Teacher] = {}
+announcements_collection: Dict[str, Announcement] = {}
+
+# Announcements ordered by created_at (most recent first). Kept in sync with
+# announcements_collection by add_announcement / remove_announcement, which
+# hold _announcements_lock while changing either.
+announcements_sorted: List[Announcement] = []
+_announcements_lock = threading.Lock()
+
+# Source of new announcement ids, seeded in init_database. next() on an
+# itertools.count is atomic, so ids stay unique across worker threads.
+_announcement_ids = itertools.count(1)
+
+# Recently verified (password hash, password fingerprint) pairs, least
+# recently used first. Only successful checks are stored, so wrong passwords
+# always pay the full Argon2 cost. Fingerprints are keyed with a per-process
+# secret so they can't be brute-forced offline like a plain digest could.
+_VERIFIED_PASSWORDS_MAX = 1024
+_verified_passwords: "OrderedDict[Tuple[str, bytes], None]" = OrderedDict()
+_verified_passwords_lock = threading.Lock()
+_fingerprint_key = secrets.token_bytes(32)
+
+# Schedule index over activities_collection. Only schedules are indexed, so
+# participant changes (signup/unregister) never require a rebuild.
+activity_index = ActivityIndex()
 
 # Methods
 
@@ -19,44 +168,146 @@ def hash_password(password):
     return ph.hash(password)
 
 
+def _password_fingerprint(plain_password: str) -> bytes:
+    """Keyed digest identifying a password without storing it"""
+    return hashlib.blake2b(plain_password.encode(), key=_fingerprint_key,
+                           digest_size=16).digest()
+
+
+def _verify_cached(stored_hash: str, pw_fingerprint: bytes) -> bool:
+    """Check whether this password was recently verified against the hash"""
+    key = (stored_hash, pw_fingerprint)
+    with _verified_passwords_lock:
+        if key not in _verified_passwords:
+            return False
+        _verified_passwords.move_to_end(key)
+        return True
+
+
+def _remember_verified(stored_hash: str, pw_fingerprint: bytes):
+    """Record a successful verification, evicting the oldest if full"""
+    with _verified_passwords_lock:
+        _verified_passwords[(stored_hash, pw_fingerprint)] = None
+        _verified_passwords.move_to_end((stored_hash, pw_fingerprint))
+        if len(_verified_passwords) > _VERIFIED_PASSWORDS_MAX:
+            _verified_passwords.popitem(last=False)
+
+
+def clear_password_cache():
+    """Forget all cached verifications (call whenever a password changes)"""
+    with _verified_passwords_lock:
+        _verified_passwords.clear()
+
+
+@lru_cache(maxsize=1024)
+def _parse_argon2_hash(hashed_password: str) -> Tuple[Parameters, bytes, bytes]:
+    """Split an encoded Argon2 hash into its parameters, salt and digest.
+
+    Raises ValueError (or an argon2 InvalidHashError) for malformed hashes.
+    """
+    parameters = extract_parameters(hashed_password)
+    encoded_salt, encoded_digest = hashed_password.rsplit("$", 2)[1:]
+    salt = base64.b64decode(encoded_salt + "=" * (-len(encoded_salt) % 4))
+    digest = base64.b64decode(encoded_digest + "=" * (-len(encoded_digest) % 4))
+    return parameters, salt, digest
+
+
 def verify_password(hashed_password: str, plain_password: str) -> bool:
     """Verify a plain password against an Argon2 hashed password.
 
+    Successful checks are cached, so repeated logins skip Argon2.
     Returns True when the password matches, False otherwise.
     """
-    ph = PasswordHasher()
-    try:
-        ph.verify(hashed_password, plain_password)
+    pw_fingerprint = _password_fingerprint(plain_password)
+    if _verify_cached(hashed_password, pw_fingerprint):
         return True
-    except argon2_exceptions.VerifyMismatchError:
-        return False
+
+    try:
+        parameters, salt, digest = _parse_argon2_hash(hashed_password)
+        candidate = hash_secret_raw(
+            plain_password.encode(),
+            salt,
+            time_cost=parameters.time_cost,
+            memory_cost=parameters.memory_cost,
+            parallelism=parameters.parallelism,
+            hash_len=parameters.hash_len,
+            type=parameters.type,
+            version=parameters.version
+        )
     except Exception:
-        # For any other exception (e.g., invalid hash), treat as non-match
+        # For any exception (e.g., invalid hash), treat as non-match
+        return False
+
+    if not hmac.compare_digest(candidate, digest):
         return False
 
+    _remember_verified(hashed_password, pw_fingerprint)
+    return True
+
+
+def allocate_announcement_id() -> str:
+    """Return an unused id for a new announcement"""
+    return str(next(_announcement_ids))
+
+
+def add_announcement(announcement: Announcement):
+    """Stamp a newly created announcement with created_at and store it.
+
+    The timestamp is taken under the same lock as the insert, so the
+    announcement really is the most recent one and belongs at the front of
+    announcements_sorted even when several are created concurrently.
+    """
+    with _announcements_lock:
+        announcement.created_at = datetime.now().isoformat()
+        announcements_collection[announcement.id] = announcement
+        announcements_sorted.insert(0, announcement)
+
+
+def remove_announcement(announcement_id: str):
+    """Delete an announcement by its id"""
+    with _announcements_lock:
+        announcement = announcements_collection.pop(announcement_id)
+        announcements_sorted.remove(announcement)
+
 
 def init_database():
     """Initialize database if empty"""
     global activities_collection, teachers_collection, announcements_collection
+    global _announcement_ids
 
     # Initialize activities if empty
     if not activities_collection:
         for name, details in initial_activities.items():
-            activities_collection[name] = details
+            activities_collection[name] = Activity(
+                name=name,
+                description=details["description"],
+                schedule=details["schedule"],
+                schedule_details=ScheduleDetails(**details["schedule_details"]),
+                max_participants=details["max_participants"],
+                participants=dict.fromkeys(details["participants"])
+            )
+
+    activity_index.rebuild(activities_collection)
 
     # Initialize teacher accounts if empty
     if not teachers_collection:
         for teacher in initial_teachers:
-            teachers_collection[teacher["username"]] = {
-                "password": teacher["password"],
-                "display_name": teacher["display_name"],
-                "role": teacher["role"]
-            }
+            teachers_collection[teacher["username"]] = Teacher(**teacher)
+            # Parse the hash now so logins don't have to
+            _parse_argon2_hash(teacher["password"])
     
     # Initialize announcements if empty
     if not announcements_collection:
         for announcement_id, details in initial_announcements.items():
-            announcements_collection[announcement_id] = details
+            announcements_collection[announcement_id] = Announcement(**details)
+
+    announcements_sorted[:] = sorted(
+        announcements_collection.values(),
+        key=attrgetter("created_at"),
+        reverse=True
+    )
+    _announcement_ids = itertools.count(
+        max((int(k) for k in announcements_collection), default=0) + 1)
 
 
 # Initial database if empty
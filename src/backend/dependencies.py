@@ -0,0 +1,31 @@
+"""
+Shared endpoint dependencies for the High School Management System API
+"""
+
+from fastapi import HTTPException, Query, Request
+from typing import Optional
+
+from .database import Teacher
+
+
+def require_teacher(
+    request: Request,
+    teacher_username: Optional[str] = Query(None)
+) -> Teacher:
+    """Return the teacher resolved by AuthMiddleware or raise 401.
+
+    Requires AuthMiddleware to be installed on any app that includes the
+    routers (app.py does this); without it every request is rejected with
+    401. teacher_username is declared so it is documented in the API docs
+    and to tell a missing login apart from an unknown one.
+    """
+    if not teacher_username:
+        raise HTTPException(
+            status_code=401, detail="Authentication required for this action")
+
+    teacher = getattr(request.state, "teacher", None)
+    if not teacher:
+        raise HTTPException(
+            status_code=401, detail="Invalid teacher credentials")
+
+    return teacher
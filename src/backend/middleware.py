@@ -0,0 +1,28 @@
+"""
+Middleware for the High School Management System API
+"""
+
+from starlette.datastructures import QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .database import teachers_collection
+
+
+class AuthMiddleware:
+    """Resolve the requesting teacher once per request.
+
+    Reads the teacher_username query parameter and stores the matching
+    teacher record (or None) on request.state.teacher. This is the only
+    place requests are matched to a teacher; require_teacher reads it.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            username = QueryParams(scope["query_string"]).get("teacher_username")
+            teacher = teachers_collection.get(username) if username else None
+            scope.setdefault("state", {})["teacher"] = teacher
+
+        await self.app(scope, receive, send)
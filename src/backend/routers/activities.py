@@ -2,11 +2,22 @@
 Endpoints for the High School Management System API
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import RedirectResponse
-from typing import Dict, Any, Optional, List
-
-from ..database import activities_collection, teachers_collection
+from typing import Dict, Any, Literal, Optional, List, Tuple
+from pydantic import BaseModel, ConfigDict
+
+from ..database import (
+    Activity,
+    ScheduleDetails,
+    Teacher,
+    activities_collection,
+    activity_index,
+    time_to_minutes
+)
+from ..dependencies import require_teacher
 
 router = APIRouter(
     prefix="/activities",
@@ -14,12 +25,103 @@ router = APIRouter(
 )
 
 
-@router.get("", response_model=Dict[str, Any])
-@router.get("/", response_model=Dict[str, Any])
+class ScheduleDetailsResponse(BaseModel):
+    """Model for the structured schedule of an activity"""
+    model_config = ConfigDict(from_attributes=True)
+
+    days: List[str]
+    start_time: str
+    end_time: str
+
+
+class ActivityResponse(BaseModel):
+    """Model for an activity returned by the API"""
+    description: str
+    schedule: str
+    schedule_details: ScheduleDetailsResponse
+    max_participants: int
+    participant_count: int
+    participants: Optional[List[str]] = None
+
+
+def _parse_time_filter(value: Optional[str]) -> Optional[int]:
+    """Convert an optional 'HH:MM' query value to minutes since midnight"""
+    if not value:
+        return None
+    try:
+        return time_to_minutes(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Invalid time format. Use HH:MM")
+
+
+def _matches_times(schedule: ScheduleDetails, start_min: Optional[int],
+                   end_min: Optional[int]) -> bool:
+    """Check an activity's schedule against the optional time filters"""
+    return ((start_min is None or schedule.start_min >= start_min)
+            and (end_min is None or schedule.end_min <= end_min))
+
+
+def _filter_activities(
+    day: Optional[str],
+    start_time: Optional[str],
+    end_time: Optional[str]
+) -> Dict[str, Activity]:
+    """Return the activities matching the optional day and time filters"""
+    if not (day or start_time or end_time):
+        return activities_collection
+
+    start_min = _parse_time_filter(start_time)
+    end_min = _parse_time_filter(end_time)
+
+    if day:
+        # A day matches only a handful of activities, so apply the time
+        # filters directly to that day's activities
+        names = [
+            name for name in activity_index.by_day.get(day, ())
+            if _matches_times(activities_collection[name].schedule_details,
+                              start_min, end_min)
+        ]
+    else:
+        # Otherwise use the sorted time lists to find the matching range
+        names = None
+
+        if start_min is not None:
+            by_start = activity_index.by_start
+            first = bisect_left(by_start, start_min, key=itemgetter(0))
+            names = {name for _, name in by_start[first:]}
+
+        if end_min is not None and (names is None or names):
+            by_end = activity_index.by_end
+            last = bisect_right(by_end, end_min, key=itemgetter(0))
+            matching = {name for _, name in by_end[:last]}
+            names = matching if names is None else names & matching
+
+    # Keep the same order as the collection
+    return {
+        name: activities_collection[name]
+        for name in sorted(names, key=activity_index.position.__getitem__)
+    }
+
+
+def _activity_response(activity: Activity, include_participants: bool) -> Dict[str, Any]:
+    """Build the API representation of an activity"""
+    return {
+        "description": activity.description,
+        "schedule": activity.schedule,
+        "schedule_details": activity.schedule_details,
+        "max_participants": activity.max_participants,
+        "participant_count": len(activity.participants),
+        "participants": list(activity.participants) if include_participants else None
+    }
+
+
+@router.get("", response_model=Dict[str, ActivityResponse], response_model_exclude_none=True)
 def get_activities(
     day: Optional[str] = None,
     start_time: Optional[str] = None,
-    end_time: Optional[str] = None
+    end_time: Optional[str] = None,
+    include: Literal["counts", "participants"] = "counts"
 ) -> Dict[str, Any]:
     """
     Get all activities with their details, with optional filtering by day and time
@@ -27,92 +129,59 @@ def get_activities(
     - day: Filter activities occurring on this day (e.g., 'Monday', 'Tuesday')
     - start_time: Filter activities starting at or after this time (24-hour format, e.g., '14:30')
     - end_time: Filter activities ending at or before this time (24-hour format, e.g., '17:00')
+    - include: 'counts' (default) returns only participant_count for each activity,
+      'participants' also returns the list of participant emails
     """
-    # Filter activities based on provided filters
-    activities = {}
-    
-    for name, activity in activities_collection.items():
-        # Apply filters if provided
-        if day and day not in activity["schedule_details"]["days"]:
-            continue
-        
-        if start_time and activity["schedule_details"]["start_time"] < start_time:
-            continue
-        
-        if end_time and activity["schedule_details"]["end_time"] > end_time:
-            continue
-        
-        activities[name] = activity
-
-    return activities
+    activities = _filter_activities(day, start_time, end_time)
+
+    include_participants = include == "participants"
+    return {
+        name: _activity_response(activity, include_participants)
+        for name, activity in activities.items()
+    }
 
 
 @router.get("/days", response_model=List[str])
-def get_available_days() -> List[str]:
+def get_available_days() -> Tuple[str, ...]:
     """Get a list of all days that have activities scheduled"""
-    # Collect unique days across all activities
-    days_set = set()
-    
-    for activity in activities_collection.values():
-        days_set.update(activity["schedule_details"]["days"])
-    
-    # Sort days alphabetically
-    return sorted(list(days_set))
+    # Days are collected and sorted alphabetically when the index is built,
+    # which only happens when the activity schedules change
+    return activity_index.sorted_days
 
 
 @router.post("/{activity_name}/signup")
-def signup_for_activity(activity_name: str, email: str, teacher_username: Optional[str] = Query(None)):
+def signup_for_activity(activity_name: str, email: str, teacher: Teacher = Depends(require_teacher)):
     """Sign up a student for an activity - requires teacher authentication"""
-    # Check teacher authentication
-    if not teacher_username:
-        raise HTTPException(
-            status_code=401, detail="Authentication required for this action")
-
-    teacher = teachers_collection.get(teacher_username)
-    if not teacher:
-        raise HTTPException(
-            status_code=401, detail="Invalid teacher credentials")
-
     # Get the activity
     activity = activities_collection.get(activity_name)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
 
     # Validate student is not already signed up
-    if email in activity["participants"]:
+    if email in activity.participants:
         raise HTTPException(
             status_code=400, detail="Already signed up for this activity")
 
     # Add student to participants
-    activity["participants"].append(email)
+    activity.participants[email] = None
 
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
 @router.post("/{activity_name}/unregister")
-def unregister_from_activity(activity_name: str, email: str, teacher_username: Optional[str] = Query(None)):
+def unregister_from_activity(activity_name: str, email: str, teacher: Teacher = Depends(require_teacher)):
     """Remove a student from an activity - requires teacher authentication"""
-    # Check teacher authentication
-    if not teacher_username:
-        raise HTTPException(
-            status_code=401, detail="Authentication required for this action")
-
-    teacher = teachers_collection.get(teacher_username)
-    if not teacher:
-        raise HTTPException(
-            status_code=401, detail="Invalid teacher credentials")
-
     # Get the activity
     activity = activities_collection.get(activity_name)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
 
     # Validate student is signed up
-    if email not in activity["participants"]:
+    if email not in activity.participants:
         raise HTTPException(
             status_code=400, detail="Not registered for this activity")
 
     # Remove student from participants
-    activity["participants"].remove(email)
+    del activity.participants[email]
 
     return {"message": f"Unregistered {email} from {activity_name}"}
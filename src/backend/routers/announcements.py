@@ -2,12 +2,23 @@
 Announcements endpoints for the High School Management System API
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, Any, List, Optional
-from datetime import datetime, date
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Dict, AsyncIterator, Iterable, List, Optional
+from datetime import date
 from pydantic import BaseModel
 
-from ..database import announcements_collection, teachers_collection
+from ..database import (
+    Announcement,
+    Teacher,
+    announcements_collection,
+    announcements_sorted,
+    add_announcement,
+    allocate_announcement_id,
+    remove_announcement
+)
+from ..dependencies import require_teacher
 
 router = APIRouter(
     prefix="/announcements",
@@ -29,163 +40,139 @@ class AnnouncementUpdate(BaseModel):
     end_date: Optional[str] = None
 
 
-@router.get("", response_model=List[Dict[str, Any]])
-@router.get("/", response_model=List[Dict[str, Any]])
-def get_active_announcements() -> List[Dict[str, Any]]:
+def _parse_iso_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date or raise 400"""
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+
+# Flush streamed JSON to the client in chunks of roughly this many bytes
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+async def _json_array_stream(items: Iterable[Announcement]) -> AsyncIterator[bytes]:
+    """Encode items as a JSON array, yielding it in chunks as it is built"""
+    buffer = bytearray(b"[")
+    separator = b""
+    for item in items:
+        buffer += separator
+        buffer += orjson.dumps(item)
+        separator = b","
+        if len(buffer) >= _STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+@router.get("", responses={200: {"model": List[Announcement]}})
+def get_active_announcements() -> StreamingResponse:
     """
     Get all active announcements (those within their date range)
     """
-    active_announcements = []
-    current_date = date.today().isoformat()
-    
-    for announcement_id, announcement in announcements_collection.items():
-        # Check if announcement is within its active date range
-        start_date = announcement.get("start_date")
-        end_date = announcement.get("end_date")
-        
-        # If start_date is set and current date is before it, skip
-        if start_date and current_date < start_date:
-            continue
-        
-        # If end_date is set and current date is after it, skip
-        if end_date and current_date > end_date:
-            continue
-        
-        active_announcements.append(announcement)
-    
-    # Sort by created_at (most recent first)
-    active_announcements.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    
-    return active_announcements
+    today = date.today().isoformat()
+
+    # Keep announcements that have started (if a start date is set) and
+    # have not expired (if an end date is set). announcements_sorted is
+    # already ordered by created_at (most recent first). Iterate over a
+    # snapshot so concurrent writes don't shift items mid-stream.
+    active_announcements = (
+        announcement for announcement in tuple(announcements_sorted)
+        if (not announcement.start_date or today >= announcement.start_date)
+        and (not announcement.end_date or today <= announcement.end_date)
+    )
 
+    return StreamingResponse(_json_array_stream(active_announcements),
+                             media_type="application/json")
 
-@router.get("/all", response_model=List[Dict[str, Any]])
-def get_all_announcements(teacher_username: Optional[str] = Query(None)) -> List[Dict[str, Any]]:
+
+@router.get("/all", responses={200: {"model": List[Announcement]}})
+def get_all_announcements(teacher: Teacher = Depends(require_teacher)) -> StreamingResponse:
     """
     Get all announcements (including expired ones) - requires teacher authentication
     """
-    # Check teacher authentication
-    if not teacher_username:
-        raise HTTPException(
-            status_code=401, detail="Authentication required for this action")
-
-    teacher = teachers_collection.get(teacher_username)
-    if not teacher:
-        raise HTTPException(
-            status_code=401, detail="Invalid teacher credentials")
-    
     # Return all announcements sorted by created_at (most recent first)
-    all_announcements = list(announcements_collection.values())
-    all_announcements.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    
-    return all_announcements
+    return StreamingResponse(_json_array_stream(tuple(announcements_sorted)),
+                             media_type="application/json")
 
 
-@router.post("", response_model=Dict[str, Any])
-@router.post("/", response_model=Dict[str, Any])
+@router.post("", response_model=Announcement)
 def create_announcement(
     announcement: AnnouncementCreate,
-    teacher_username: Optional[str] = Query(None)
-) -> Dict[str, Any]:
+    teacher: Teacher = Depends(require_teacher)
+) -> Announcement:
     """
     Create a new announcement - requires teacher authentication
     """
-    # Check teacher authentication
-    if not teacher_username:
-        raise HTTPException(
-            status_code=401, detail="Authentication required for this action")
-
-    teacher = teachers_collection.get(teacher_username)
-    if not teacher:
-        raise HTTPException(
-            status_code=401, detail="Invalid teacher credentials")
-    
     # Validate that end_date is provided
     if not announcement.end_date:
         raise HTTPException(
             status_code=400, detail="Expiration date is required")
     
-    # Validate date format and that end_date is in the future
-    try:
-        end_date_obj = datetime.fromisoformat(announcement.end_date).date()
-        if end_date_obj < date.today():
-            raise HTTPException(
-                status_code=400, detail="Expiration date must be in the future")
-        
-        # Validate start_date if provided
-        if announcement.start_date:
-            start_date_obj = datetime.fromisoformat(announcement.start_date).date()
-            if start_date_obj > end_date_obj:
-                raise HTTPException(
-                    status_code=400, detail="Start date must be before expiration date")
-    except ValueError:
+    # Validate date format
+    end_date_obj = _parse_iso_date(announcement.end_date)
+    start_date_obj = (_parse_iso_date(announcement.start_date)
+                      if announcement.start_date else None)
+
+    # Validate that end_date is in the future
+    if end_date_obj < date.today():
         raise HTTPException(
-            status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+            status_code=400, detail="Expiration date must be in the future")
+
+    # Validate start_date if provided
+    if start_date_obj and start_date_obj > end_date_obj:
+        raise HTTPException(
+            status_code=400, detail="Start date must be before expiration date")
     
     # Generate new ID
-    new_id = str(max([int(k) for k in announcements_collection.keys()], default=0) + 1)
+    new_id = allocate_announcement_id()
     
     # Create announcement
-    new_announcement = {
-        "id": new_id,
-        "message": announcement.message,
-        "start_date": announcement.start_date,
-        "end_date": announcement.end_date,
-        "created_by": teacher_username,
-        "created_at": datetime.now().isoformat()
-    }
+    new_announcement = Announcement(
+        id=new_id,
+        message=announcement.message,
+        start_date=announcement.start_date,
+        end_date=announcement.end_date,
+        created_by=teacher.username
+    )
     
-    announcements_collection[new_id] = new_announcement
+    add_announcement(new_announcement)
     
     return new_announcement
 
 
-@router.put("/{announcement_id}", response_model=Dict[str, Any])
+@router.put("/{announcement_id}", response_model=Announcement)
 def update_announcement(
     announcement_id: str,
     announcement: AnnouncementUpdate,
-    teacher_username: Optional[str] = Query(None)
-) -> Dict[str, Any]:
+    teacher: Teacher = Depends(require_teacher)
+) -> Announcement:
     """
     Update an existing announcement - requires teacher authentication
     """
-    # Check teacher authentication
-    if not teacher_username:
-        raise HTTPException(
-            status_code=401, detail="Authentication required for this action")
-
-    teacher = teachers_collection.get(teacher_username)
-    if not teacher:
-        raise HTTPException(
-            status_code=401, detail="Invalid teacher credentials")
-    
     # Find the announcement
     existing_announcement = announcements_collection.get(announcement_id)
     if not existing_announcement:
         raise HTTPException(status_code=404, detail="Announcement not found")
     
-    # Update fields if provided
-    if announcement.message is not None:
-        existing_announcement["message"] = announcement.message
-    
-    if announcement.start_date is not None:
-        existing_announcement["start_date"] = announcement.start_date
-    
-    if announcement.end_date is not None:
+    # Only the fields that were provided; None means "leave unchanged"
+    patch = announcement.model_dump(exclude_none=True)
+
+    if "end_date" in patch:
         # Validate date format
-        try:
-            end_date_obj = datetime.fromisoformat(announcement.end_date).date()
-            start_date = existing_announcement.get("start_date")
-            if start_date:
-                start_date_obj = datetime.fromisoformat(start_date).date()
-                if start_date_obj > end_date_obj:
-                    raise HTTPException(
-                        status_code=400, detail="Start date must be before expiration date")
-        except ValueError:
+        start_date = patch.get("start_date", existing_announcement.start_date)
+        end_date_obj = _parse_iso_date(patch["end_date"])
+        start_date_obj = _parse_iso_date(start_date) if start_date else None
+
+        if start_date_obj and start_date_obj > end_date_obj:
             raise HTTPException(
-                status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        existing_announcement["end_date"] = announcement.end_date
+                status_code=400, detail="Start date must be before expiration date")
+
+    for field, value in patch.items():
+        setattr(existing_announcement, field, value)
     
     return existing_announcement
 
@@ -193,25 +180,15 @@ def update_announcement(
 @router.delete("/{announcement_id}")
 def delete_announcement(
     announcement_id: str,
-    teacher_username: Optional[str] = Query(None)
+    teacher: Teacher = Depends(require_teacher)
 ) -> Dict[str, str]:
     """
     Delete an announcement - requires teacher authentication
     """
-    # Check teacher authentication
-    if not teacher_username:
-        raise HTTPException(
-            status_code=401, detail="Authentication required for this action")
-
-    teacher = teachers_collection.get(teacher_username)
-    if not teacher:
-        raise HTTPException(
-            status_code=401, detail="Invalid teacher credentials")
-    
     # Find and delete the announcement
     if announcement_id not in announcements_collection:
         raise HTTPException(status_code=404, detail="Announcement not found")
     
-    del announcements_collection[announcement_id]
+    remove_announcement(announcement_id)
     
     return {"message": "Announcement deleted successfully"}
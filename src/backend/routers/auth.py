@@ -20,15 +20,15 @@ def login(username: str, password: str) -> Dict[str, Any]:
     teacher = teachers_collection.get(username)
 
     # Verify password using Argon2 verifier from database.py
-    if not teacher or not verify_password(teacher.get("password", ""), password):
+    if not teacher or not verify_password(teacher.password, password):
         raise HTTPException(
             status_code=401, detail="Invalid username or password")
 
     # Return teacher information (excluding password)
     return {
         "username": username,
-        "display_name": teacher.get("display_name", teacher.get("name", "")),
-        "role": teacher.get("role", "teacher")
+        "display_name": teacher.display_name,
+        "role": teacher.role
     }
 
 
@@ -42,6 +42,6 @@ def check_session(username: str) -> Dict[str, Any]:
 
     return {
         "username": username,
-        "display_name": teacher.get("display_name", teacher.get("name", "")),
-        "role": teacher.get("role", "teacher")
+        "display_name": teacher.display_name,
+        "role": teacher.role
     }
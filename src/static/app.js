@@ -710,8 +710,9 @@ document.addEventListener("DOMContentLoaded", () => {
     showLoadingSkeletons();
 
     try {
-      // Build query string with filters if they exist
-      let queryParams = [];
+      // Build query string with filters if they exist. Participant lists
+      // are requested explicitly since the API returns only counts by default
+      let queryParams = ["include=participants"];
 
       // Handle day filter
       if (currentDay) {
@@ -733,8 +734,7 @@ document.addEventListener("DOMContentLoaded", () => {
         }
       }
 
-      const queryString =
-        queryParams.length > 0 ? `?${queryParams.join("&")}` : "";
+      const queryString = `?${queryParams.join("&")}`;
       const response = await fetch(`/activities${queryString}`);
       const activities = await response.json();
 
@@ -820,7 +820,7 @@ document.addEventListener("DOMContentLoaded", () => {
 
     // Calculate spots and capacity
     const totalSpots = details.max_participants;
-    const takenSpots = details.participants.length;
+    const takenSpots = details.participant_count;
     const spotsLeft = totalSpots - takenSpots;
     const capacityPercentage = (takenSpots / totalSpots) * 100;
     const isFull = spotsLeft <= 0;